@@ -1,12 +1,21 @@
 import streamlit as st
-import geopandas as gpd
+import pyogrio
 import folium
-from streamlit_folium import st_folium
+import streamlit.components.v1 as components
+import bisect
 import json
+import re
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:  # orjson est optionnel, repli sur json
+    orjson = None
 
 # -------------------------------------------------------
 # CONFIGURATION DE LA PAGE
@@ -21,16 +30,14 @@ st.set_page_config(
 # -------------------------------------------------------
 # CHARGEMENT DES STYLES CSS EXTERNES
 # -------------------------------------------------------
-@st.cache_data
+@st.cache_resource
 def load_css(file_path="style.css"):
     """Charge le fichier CSS externe"""
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            css = f.read()
-        return css
-    except FileNotFoundError:
+    path = Path(file_path)
+    if not path.exists():
         st.warning(f"⚠️ Fichier CSS '{file_path}' non trouvé. Styles par défaut utilisés.")
         return ""
+    return path.read_text(encoding="utf-8")
 
 # Charger et appliquer les styles CSS
 css_content = load_css()
@@ -40,125 +47,369 @@ if css_content:
 # -------------------------------------------------------
 # CHARGEMENT DES DONNÉES PAR DATE
 # -------------------------------------------------------
-@st.cache_data
+def read_json(file_path):
+    """Lit un fichier JSON avec orjson si disponible, sinon avec json"""
+    if orjson is not None:
+        with open(file_path, "rb") as f:
+            return orjson.loads(f.read())
+    with open(file_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+INDICATEURS = ['Situation générale', 'Activités économiques', 'Circulation', 'Couvre-feu']
+
+def flatten_security_data(by_date):
+    """Aplatit {date: {région: indicateurs}} en un DataFrame indexé par (date, région)"""
+    index = pd.MultiIndex.from_tuples(
+        [(d, region) for d, regions in by_date.items() for region in regions],
+        names=['Date', 'Région']
+    )
+    rows = [info for regions in by_date.values() for info in regions.values()]
+    return pd.DataFrame(rows, index=index, columns=INDICATEURS)
+
+@st.cache_resource
 def load_security_data_by_date():
-    """Charge les données de sécurité organisées par date"""
+    """Charge les données de sécurité organisées par date, avec la liste des dates triées"""
     file_path = "security_data.json"
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        
-        # Vérifier si les données sont déjà structurées par date
-        # Si la première clé est une date (format YYYY-MM-DD)
-        first_key = list(data.keys())[0] if data else ""
-        
-        if first_key and len(first_key) == 10 and first_key[4] == '-' and first_key[7] == '-':
-            # Structure déjà par date
-            return data
-        else:
-            # Structure simple (ancien format) - créer une date unique
-            today = datetime.now().strftime("%Y-%m-%d")
-            return {today: data}
-    
-    except FileNotFoundError:
+    if not Path(file_path).exists():
         st.error("⚠️ Fichier security_data.json non trouvé")
-        return {}
+        return {
+            "by_date": {},
+            "available_dates": [],
+            "sorted_dates": [],
+            "formatted_dates": {},
+            "frame": flatten_security_data({})
+        }
+    
+    data = read_json(file_path)
+    
+    # Vérifier si les données sont déjà structurées par date
+    # Si la première clé est une date (format YYYY-MM-DD)
+    first_key = next(iter(data), "")
+    try:
+        date.fromisoformat(first_key)
+        # Structure déjà par date
+        by_date = data
+    except ValueError:
+        # Structure simple (ancien format) - créer une date unique
+        today = datetime.now().strftime("%Y-%m-%d")
+        by_date = {today: data}
+    
+    # Dates triées et parsées une seule fois (la plus récente en premier)
+    available_dates = sorted(by_date, key=date.fromisoformat, reverse=True)
+    sorted_dates = [date.fromisoformat(k) for k in available_dates]
+    return {
+        "by_date": by_date,
+        "available_dates": available_dates,
+        "sorted_dates": sorted_dates,
+        "formatted_dates": {k: d.strftime("%d/%m/%Y") for k, d in zip(available_dates, sorted_dates)},
+        "frame": flatten_security_data(by_date)
+    }
 
 @st.cache_data
 def load_risk_data():
-    """Charge les données de risque depuis risque.json"""
+    """Charge les données de risque depuis risque.json, indexées par (date, région)"""
     file_path = "risque.json"
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        return data
-    except FileNotFoundError:
+    if not Path(file_path).exists():
         st.warning("⚠️ Fichier risque.json non trouvé. Calcul automatique utilisé.")
         return {}
+    data = read_json(file_path)
+    return {(d, r): level for d, regions in data.items() for r, level in regions.items()}
+
+@st.cache_data
+def load_risk_evolution():
+    """Table longue (Date, Région, Niveau, Score) de risque.json, triée par date, pour le graphe d'évolution"""
+    items = [(d, r, level) for (d, r), level in load_risk_data().items() if level]
+    evo_df = pd.DataFrame(items, columns=["Date", "Région", "Niveau"])
+    evo_df["Date"] = pd.to_datetime(evo_df["Date"], format="%Y-%m-%d", errors="coerce")
+    evo_df["Score"] = evo_df["Niveau"].map({"Faible": 1, "Moyen": 2, "Élevé": 3})
+    return evo_df.sort_values("Date", kind="stable", ignore_index=True)
 
 @st.cache_data
+def load_top_stories():
+    """Charge les Top Stories par date depuis top_stories.json"""
+    file_path = "top_stories.json"
+    if not Path(file_path).exists():
+        st.warning("⚠️ Fichier top_stories.json non trouvé")
+        return {}
+    return read_json(file_path)
+
+@st.cache_resource
 def load_geodata():
     geojson_file = "geoBoundaries-CMR-ADM1_simplified.geojson"
-    try:
-        return gpd.read_file(geojson_file)
-    except FileNotFoundError:
+    if not Path(geojson_file).exists():
         st.error("⚠️ Fichier GeoJSON non trouvé")
         return None
+    # Lecteur vectorisé pyogrio plutôt que l'itération Fiona feature par feature ;
+    # seuls le nom de la région et la géométrie sont utilisés par la carte
+    return pyogrio.read_dataframe(geojson_file, columns=["shapeName"])
 
-all_security_data = load_security_data_by_date()
+security_store = load_security_data_by_date()
+all_security_data = security_store["by_date"]
 risk_data = load_risk_data()
 gdf = load_geodata()
 
-# Obtenir la liste des dates disponibles
-available_dates = sorted(all_security_data.keys(), reverse=True)
+# Obtenir la liste des dates disponibles et leur affichage JJ/MM/AAAA
+available_dates = security_store["available_dates"]
+formatted_dates = security_store["formatted_dates"]
 
 # -------------------------------------------------------
 # FONCTIONS D'ANALYSE
 # -------------------------------------------------------
-def calculate_alert_level(region_data, region_name="", date_str=""):
-    """Calcule le niveau d'alerte basé sur risque.json ou les indicateurs"""
-    
-    # Essayer d'abord de lire depuis risque.json
-    if date_str and region_name and date_str in risk_data and region_name in risk_data[date_str]:
-        level_fr = risk_data[date_str][region_name]
-        
-        # Convertir le niveau français en format standard
-        if level_fr == "Élevé":
-            return "Élevé", "🔴", "#d32f2f"
-        elif level_fr == "Moyen":
-            return "Moyen", "🟡", "#f57c00"
-        elif level_fr == "Faible":
-            return "Faible", "🟢", "#388e3c"
-    
-    # Si pas trouvé dans risque.json, utiliser l'ancien calcul
-    score = 0
-    situation = region_data.get('Situation générale', '').lower()
-    activites = region_data.get('Activités économiques', '').lower()
-    couvre_feu = region_data.get('Couvre-feu', '').lower()
-    
-    # Analyse de la situation
-    if 'tendu' in situation or 'pillage' in situation:
-        score += 3
-    elif 'ghost town' in situation:
-        score += 4
-    elif 'ras' in situation or 'calme' in situation:
-        score += 0
-    else:
-        score += 1
+# Niveaux d'alerte par ordre croissant : (niveau, icône, couleur)
+_LEVELS = [("Faible", "🟢", "#388e3c"), ("Moyen", "🟡", "#f57c00"), ("Élevé", "🔴", "#d32f2f")]
+_LEVEL_BY_FR = {level[0]: level for level in _LEVELS}
+# Scores à partir desquels on passe au niveau Moyen puis Élevé
+_THRESHOLDS = [2, 5]
+
+# Groupes de mots-clés rangés par ordre de priorité, et leur score
+_SITUATION_GROUPS = ('tendu|pillage', 'ghost town', 'ras|calme')
+_SITUATION_SCORES = (3, 4, 0)
+_ACTIVITES_GROUPS = ('fermé|ralenti|vide', 'variable')
+_ACTIVITES_SCORES = (2, 1)
+
+# Expression compilée une fois, insensible à la casse
+_COUVRE_FEU_RE = re.compile(r'interdiction|ghost town', re.IGNORECASE)
+
+def compute_alert_levels(regions_df, date_str=""):
+    """Calcule en une seule passe vectorisée les niveaux d'alerte de toutes les régions"""
+    fields = regions_df[['Situation générale', 'Activités économiques', 'Couvre-feu']].fillna('').astype(str)
+    situation = fields['Situation générale']
+    activites = fields['Activités économiques']
+    
+    # Analyse de la situation (premier groupe trouvé dans l'ordre de priorité)
+    score = np.select(
+        [situation.str.contains(g, case=False) for g in _SITUATION_GROUPS],
+        _SITUATION_SCORES,
+        default=1
+    )
     
     # Analyse des activités économiques
-    if 'fermé' in activites or 'ralenti' in activites or 'vide' in activites:
-        score += 2
-    elif 'variable' in activites:
-        score += 1
+    score += np.select(
+        [activites.str.contains(g, case=False) for g in _ACTIVITES_GROUPS],
+        _ACTIVITES_SCORES,
+        default=0
+    )
     
     # Analyse du couvre-feu
-    if 'interdiction' in couvre_feu or 'ghost town' in couvre_feu:
-        score += 2
+    score += fields['Couvre-feu'].str.contains(_COUVRE_FEU_RE).to_numpy() * 2
     
     # Détermination du niveau
-    if score >= 5:
-        return "Élevé", "🔴", "#d32f2f"
-    elif score >= 2:
-        return "Moyen", "🟡", "#f57c00"
-    else:
-        return "Faible", "🟢", "#388e3c"
+    labels = np.array([lvl for lvl, _, _ in _LEVELS], dtype=object)
+    level = pd.Series(
+        labels[np.searchsorted(_THRESHOLDS, score, side='right')],
+        index=regions_df.index
+    )
+    
+    # Les niveaux de risque.json priment sur le calcul automatique
+    level_fr = pd.Series([risk_data.get((date_str, r)) for r in regions_df.index], index=regions_df.index)
+    level = level_fr.where(level_fr.isin(list(_LEVEL_BY_FR)), level)
+    
+    return pd.DataFrame({
+        'Niveau': level,
+        'Icône': level.map({lvl: icon for lvl, icon, _ in _LEVELS}),
+        'Couleur': level.map({lvl: color for lvl, _, color in _LEVELS})
+    })
 
-def create_statistics_dataframe(data, date_str=""):
+def calculate_alert_level(region_data, region_name="", date_str=""):
+    """Niveau d'alerte d'une seule région : enveloppe de compute_alert_levels"""
+    regions_df = pd.DataFrame([region_data], index=[region_name], columns=INDICATEURS)
+    return tuple(compute_alert_levels(regions_df, date_str).iloc[0])
+
+@st.cache_data(show_spinner=False)
+def create_statistics_dataframe(date_str):
     """Crée un DataFrame pour l'analyse statistique"""
-    rows = []
-    for region, info in data.items():
-        level, icon, color = calculate_alert_level(info, region, date_str)
-        rows.append({
-            'Région': region,
-            'Niveau d\'alerte': level,
-            'Icône': icon,
-            'Situation': info.get('Situation générale', 'N/A'),
-            'Activités': info.get('Activités économiques', 'N/A'),
-            'Circulation': info.get('Circulation', 'N/A'),
-            'Couvre-feu': info.get('Couvre-feu', 'N/A')
-        })
-    return pd.DataFrame(rows)
+    regions_df = security_store["frame"].loc[date_str]
+    alerts = compute_alert_levels(regions_df, date_str)
+    details = regions_df.fillna('N/A')
+    return pd.DataFrame({
+        'Région': pd.Categorical(regions_df.index),
+        'Niveau d\'alerte': pd.Categorical(
+            alerts['Niveau'], categories=[lvl for lvl, _, _ in _LEVELS], ordered=True
+        ),
+        'Icône': alerts['Icône'].to_numpy(),
+        'Situation': details['Situation générale'].to_numpy(),
+        'Activités': details['Activités économiques'].to_numpy(),
+        'Circulation': details['Circulation'].to_numpy(),
+        'Couvre-feu': details['Couvre-feu'].to_numpy(),
+        # Indicateur normalisé une fois ici plutôt qu'à chaque filtrage (non affiché)
+        'Couvre-feu actif': (details['Couvre-feu'].str.strip().str.lower() != 'ras').to_numpy()
+    })
+
+@st.cache_data
+def create_comparison_dataframe(dates, regions):
+    """Niveaux d'alerte des régions choisies, une ligne par (date, région), pour le comparatif"""
+    frame = security_store["frame"]
+    date_col, region_col, level_col = [], [], []
+    for date_str in dates:
+        present = [r for r in regions if r in all_security_data.get(date_str, {})]
+        if not present:
+            continue
+        alerts = compute_alert_levels(frame.loc[date_str].loc[present], date_str)
+        date_col += [formatted_dates[date_str]] * len(present)
+        region_col += present
+        level_col += alerts['Niveau'].tolist()
+    return pd.DataFrame({'Date': date_col, 'Région': region_col, 'Niveau': level_col})
+
+@st.cache_data(show_spinner=False)
+def to_csv_bytes(df):
+    """Export CSV (UTF-8 avec BOM pour Excel), régénéré seulement quand le tableau change"""
+    return df.to_csv(index=False).encode('utf-8-sig')
+
+# -------------------------------------------------------
+# CONSTRUCTION DE LA CARTE
+# -------------------------------------------------------
+@st.cache_resource
+def load_region_features():
+    """Convertit une seule fois les géométries en features GeoJSON indexées par région"""
+    # Seuls le type, la géométrie et shapeName sont conservés (pas d'id ni de bbox à sérialiser)
+    return {
+        f['properties']['shapeName']: {
+            "type": "Feature",
+            "properties": {"shapeName": f['properties']['shapeName']},
+            "geometry": f['geometry']
+        }
+        for f in gdf.__geo_interface__['features']
+    }
+
+def build_enhanced_tooltip(region, d, alert, date_display):
+    """Tooltip HTML d'une région à partir de ses indicateurs et de son niveau d'alerte"""
+    level, icon, color = alert
+    
+    return (
+        f"<div style='font-family: Arial; min-width: 250px;'>"
+        f"<h4 style='margin:0; color:{color};'>{icon} {region}</h4>"
+        f"<p style='margin:5px 0; font-size:0.9em; color:#666;'>{date_display}</p>"
+        f"<hr style='margin: 5px 0;'>"
+        f"<b>Niveau d'alerte :</b> <span style='color:{color};'>{level}</span><br><br>"
+        f"<b>🏛️ Situation générale :</b><br>{d.get('Situation générale', 'N/A')}<br><br>"
+        f"<b>💼 Activités économiques :</b><br>{d.get('Activités économiques', 'N/A')}<br><br>"
+        f"<b>🚗 Circulation :</b><br>{d.get('Circulation', 'N/A')}<br><br>"
+        f"<b>🌙 Couvre-feu :</b><br>{d.get('Couvre-feu', 'N/A')}"
+        f"</div>"
+    )
+
+@st.cache_resource(max_entries=64)
+def build_map_html(selected_date, regions_key):
+    """Construit et pré-rend la carte folium pour une date et une sélection de régions"""
+    security_data = all_security_data.get(selected_date, {})
+    date_display = formatted_dates[selected_date]
+    
+    # Niveaux repris du tableau statistique en cache (même calcul que les tableaux)
+    stats = create_statistics_dataframe(selected_date)
+    alerts = {
+        region: (level, icon, _LEVEL_BY_FR[level][2])
+        for region, level, icon in zip(stats['Région'], stats['Niveau d\'alerte'], stats['Icône'])
+    }
+    
+    # Création de la carte
+    m = folium.Map(
+        location=[7, 12],
+        zoom_start=6,
+        tiles='CartoDB positron',
+        name='CartoDB Positron'
+    )
+    
+    # Ajout des autres couches (optionnelles)
+    folium.TileLayer('CartoDB dark_matter', name='CartoDB Dark').add_to(m)
+    folium.TileLayer('OpenStreetMap', name='OpenStreetMap').add_to(m)
+    
+    # Ajout des régions sélectionnées en une seule couche GeoJSON :
+    # couleur et tooltip sont portés par les propriétés de chaque feature
+    # (copies : les features en cache sont partagées entre les sessions)
+    features = [
+        {**feature, "properties": {
+            **feature["properties"],
+            "alert_color": alerts[region][2],
+            "tooltip": build_enhanced_tooltip(region, security_data[region], alerts[region], date_display)
+        }}
+        for region, feature in load_region_features().items()
+        if region in regions_key
+    ]
+    if features:
+        folium.GeoJson(
+            {"type": "FeatureCollection", "features": features},
+            name="Niveaux d'alerte",
+            style_function=lambda feature: {
+                "fillColor": feature["properties"]["alert_color"],
+                "color": "black",
+                "weight": 2,
+                "fillOpacity": 0.5
+            },
+            highlight_function=lambda x: {
+                "weight": 4,
+                "color": "blue",
+                "fillOpacity": 0.7
+            },
+            tooltip=folium.GeoJsonTooltip(fields=["tooltip"], labels=False, sticky=True)
+        ).add_to(m)
+    
+    # Ajout d'une légende
+    legend_html = f'''
+    <div style="position: fixed; 
+                bottom: 50px; right: 50px; width: 200px; height: 140px; 
+                background-color: white; z-index:9999; font-size:14px;
+                border:2px solid grey; border-radius: 5px; padding: 10px">
+    <p style="margin:0; font-weight:bold;">Niveau d'alerte</p>
+    <p style="margin:3px 0; font-size:11px; color:#666;">{date_display}</p>
+    <p style="margin:5px 0;"><span style="color:#d32f2f;">⬤</span> Élevé</p>
+    <p style="margin:5px 0;"><span style="color:#f57c00;">⬤</span> Moyen</p>
+    <p style="margin:5px 0;"><span style="color:#388e3c;">⬤</span> Faible</p>
+    </div>
+    '''
+    m.get_root().html.add_child(folium.Element(legend_html))
+    
+    # Ajout du contrôle de couches
+    folium.LayerControl().add_to(m)
+    
+    # Rendu HTML une seule fois : les reruns suivants ne repassent pas par les templates folium
+    return m.get_root().render()
+
+# -------------------------------------------------------
+# GRAPHIQUES (MIS EN CACHE)
+# -------------------------------------------------------
+@st.cache_data(show_spinner=False)
+def build_alert_pie(counts):
+    """Camembert de répartition ; counts = ((niveau, nombre de régions), ...)"""
+    levels = [level for level, _ in counts]
+    fig_pie = px.pie(
+        values=[n for _, n in counts],
+        names=levels,
+        title="Répartition des Niveaux d'Alerte",
+        color=levels,
+        color_discrete_map={level: color for level, _, color in _LEVELS}
+    )
+    fig_pie.update_traces(textposition='inside', textinfo='percent+label')
+    return fig_pie
+
+@st.cache_data(show_spinner=False)
+def build_evolution_figure(regions):
+    """Courbes d'évolution du risque (risque.json) pour les régions données ; None si aucune donnée"""
+    evo_all = load_risk_evolution()
+    evo_df = evo_all[evo_all["Région"].isin(regions)]
+    if evo_df.empty:
+        return None
+    
+    fig_evo = px.line(
+        evo_df,
+        x="Date",
+        y="Score",
+        color="Région",
+        line_shape="spline",
+        markers=True,
+        title="Évolution du niveau de risque par région (sélection restreinte)",
+        hover_data=["Niveau"]
+    )
+    
+    # Afficher labels lisibles pour l'axe Y
+    fig_evo.update_yaxes(
+        tickmode="array",
+        tickvals=[1, 2, 3],
+        ticktext=["Faible", "Moyen", "Élevé"],
+        range=[0.8, 3.2]
+    )
+    
+    fig_evo.update_layout(hovermode="x unified", legend_title_text="Région")
+    return fig_evo
 
 # -------------------------------------------------------
 st.markdown('<div class="main-header">🛡️ Veille Sécuritaire – Cameroun Post-Scrutin Présidentiel</div>', 
@@ -184,16 +435,17 @@ st.sidebar.markdown("---")
 st.sidebar.subheader("📅 Sélection de la Date")
 
 if available_dates:
-    # Convertir les dates en objets datetime pour le sélecteur
-    date_objects = [datetime.strptime(d, "%Y-%m-%d").date() for d in available_dates]
+    # Dates déjà converties et triées (ordre décroissant) au chargement
+    date_objects = security_store["sorted_dates"]
     
     # Sélecteur de date avec la date la plus récente par défaut
     selected_date_obj = st.sidebar.date_input(
         "Choisir une date",
         value=date_objects[0],  # Date la plus récente par défaut
-        min_value=min(date_objects),
-        max_value=max(date_objects),
-        format="DD/MM/YYYY"
+        min_value=date_objects[-1],
+        max_value=date_objects[0],
+        format="DD/MM/YYYY",
+        key="date_selector"
     )
     
     # Convertir la date sélectionnée en string au format YYYY-MM-DD
@@ -204,11 +456,12 @@ if available_dates:
         st.sidebar.success(f"✅ Données disponibles")
     else:
         st.sidebar.error(f"❌ Pas de données pour cette date")
-        # Trouver la date la plus proche
-        closest_date = min(available_dates, key=lambda d: abs(
-            datetime.strptime(d, "%Y-%m-%d") - datetime.strptime(selected_date, "%Y-%m-%d")
-        ))
-        st.sidebar.info(f"📍 Date la plus proche : {datetime.strptime(closest_date, '%Y-%m-%d').strftime('%d/%m/%Y')}")
+        # Trouver la date la plus proche : bissection directe sur les dates triées (ordre décroissant)
+        i = bisect.bisect_left(date_objects, -selected_date_obj.toordinal(), key=lambda d: -d.toordinal())
+        neighbours = [j for j in (i - 1, i) if 0 <= j < len(date_objects)]  # à égalité, la plus récente
+        closest_index = min(neighbours, key=lambda j: abs(date_objects[j] - selected_date_obj))
+        closest_date = available_dates[closest_index]
+        st.sidebar.info(f"📍 Date la plus proche : {formatted_dates[closest_date]}")
         selected_date = closest_date
     
     # Afficher le nombre de jours de données disponibles
@@ -217,8 +470,7 @@ if available_dates:
     # Bouton pour voir toutes les dates
     with st.sidebar.expander("📋 Voir toutes les dates"):
         for date_str in available_dates:
-            date_formatted = datetime.strptime(date_str, "%Y-%m-%d").strftime("%d/%m/%Y")
-            st.write(f"• {date_formatted}")
+            st.write(f"• {formatted_dates[date_str]}")
 
 else:
     st.sidebar.error("❌ Aucune donnée disponible")
@@ -234,47 +486,51 @@ if not security_data:
     st.stop()
 
 # Afficher la date sélectionnée dans le titre
-date_display = datetime.strptime(selected_date, "%Y-%m-%d").strftime("%d/%m/%Y")
+date_display = formatted_dates[selected_date]
 st.markdown(f'<div class="timestamp">📅 Situation au : {date_display}</div>', 
             unsafe_allow_html=True)
 
 # -------------------------------------------------------
 # SUITE DES FILTRES SIDEBAR
 # -------------------------------------------------------
-# Filtre par niveau d'alerte
-st.sidebar.subheader("Filtrer par niveau d'alerte")
-show_high = st.sidebar.checkbox("🔴 Alerte Élevée", value=True)
-show_medium = st.sidebar.checkbox("🟡 Alerte Moyenne", value=True)
-show_low = st.sidebar.checkbox("🟢 Alerte Faible", value=True)
-
-st.sidebar.markdown("---")
-
-# Sélection des régions
-st.sidebar.subheader("Sélectionner les régions")
+# Filtres regroupés dans un formulaire : un seul rerun à la validation
 all_regions = list(security_data.keys())
-selected_regions = st.sidebar.multiselect(
-    "Choisir les régions à afficher",
-    options=all_regions,
-    default=all_regions
-)
-
-st.sidebar.markdown("---")
-
-# Options d'affichage
-st.sidebar.subheader("Options d'affichage")
-show_map = st.sidebar.checkbox("Afficher la carte", value=True)
-show_stats = st.sidebar.checkbox("Afficher les statistiques", value=True)
-show_comparison = st.sidebar.checkbox("Comparer avec d'autres dates", value=False)
-show_table = st.sidebar.checkbox("Afficher le tableau détaillé", value=True)
+with st.sidebar.form("filters"):
+    # Filtre par niveau d'alerte
+    st.subheader("Filtrer par niveau d'alerte")
+    show_high = st.checkbox("🔴 Alerte Élevée", value=True, key="show_high")
+    show_medium = st.checkbox("🟡 Alerte Moyenne", value=True, key="show_medium")
+    show_low = st.checkbox("🟢 Alerte Faible", value=True, key="show_low")
+    
+    st.markdown("---")
+    
+    # Sélection des régions
+    st.subheader("Sélectionner les régions")
+    selected_regions = st.multiselect(
+        "Choisir les régions à afficher",
+        options=all_regions,
+        default=all_regions,
+        key="region_filter"
+    )
+    
+    st.markdown("---")
+    
+    # Options d'affichage
+    st.subheader("Options d'affichage")
+    show_map = st.checkbox("Afficher la carte", value=True, key="show_map")
+    show_stats = st.checkbox("Afficher les statistiques", value=True, key="show_stats")
+    show_comparison = st.checkbox("Comparer avec d'autres dates", value=False, key="show_comparison")
+    show_table = st.checkbox("Afficher le tableau détaillé", value=True, key="show_table")
+    
+    st.form_submit_button("Appliquer les filtres")
 
 # -------------------------------------------------------
 # MÉTRIQUES PRINCIPALES
 # -------------------------------------------------------
 st.subheader("📊 Vue d'Ensemble Nationale")
 
-# Charger les Top Stories depuis le fichier JSON
-with open("top_stories.json", "r", encoding="utf-8") as f:
-    top_stories_data = json.load(f)
+# Charger les Top Stories depuis le fichier JSON (mis en cache)
+top_stories_data = load_top_stories()
 
 # Récupérer les Top Stories pour la date sélectionnée
 top_stories = top_stories_data.get(selected_date, {})
@@ -287,26 +543,27 @@ with st.expander(f"📰 Top Stories ({date_display})", expanded=True):
         st.info(f"Aucune rubrique 'Top Stories' disponible pour le {date_display}.")
 
 
-df_stats = create_statistics_dataframe(security_data, selected_date)
+df_stats = create_statistics_dataframe(selected_date)
 
-# Filtrer selon les critères
-filtered_df = df_stats[df_stats['Région'].isin(selected_regions)]
-if not show_high:
-    filtered_df = filtered_df[filtered_df["Niveau d'alerte"] != "Élevé"]
-if not show_medium:
-    filtered_df = filtered_df[filtered_df["Niveau d'alerte"] != "Moyen"]
-if not show_low:
-    filtered_df = filtered_df[filtered_df["Niveau d'alerte"] != "Faible"]
+# Filtrer selon les critères (un seul masque combiné)
+allowed_levels = [
+    level for level, shown in (("Élevé", show_high), ("Moyen", show_medium), ("Faible", show_low))
+    if shown
+]
+mask = df_stats['Région'].isin(selected_regions) & df_stats["Niveau d'alerte"].isin(allowed_levels)
+filtered_df = df_stats.loc[mask]
 
 # Calcul des métriques
 total_regions = len(filtered_df)
-alert_high_df = filtered_df[filtered_df["Niveau d'alerte"] == "Élevé"]
-alert_medium_df = filtered_df[filtered_df["Niveau d'alerte"] == "Moyen"]
-alert_low_df = filtered_df[filtered_df["Niveau d'alerte"] == "Faible"]
+# Régions par niveau d'alerte en un seul groupby (niveaux absents : liste vide)
+regions_by_level = filtered_df.groupby("Niveau d'alerte", observed=True)["Région"].apply(list)
+alert_high_regions = regions_by_level.get("Élevé", [])
+alert_medium_regions = regions_by_level.get("Moyen", [])
+alert_low_regions = regions_by_level.get("Faible", [])
 
-alert_high = len(alert_high_df)
-alert_medium = len(alert_medium_df)
-alert_low = len(alert_low_df)
+alert_high = len(alert_high_regions)
+alert_medium = len(alert_medium_regions)
+alert_low = len(alert_low_regions)
 
 # Affichage des métriques en colonnes
 col1, col2, col3, col4 = st.columns(4)
@@ -326,7 +583,7 @@ with col2:
         delta_color="inverse"
     )
     if alert_high > 0:
-        st.caption(", ".join(alert_high_df["Région"].tolist()))
+        st.caption(", ".join(alert_high_regions))
 
 with col3:
     st.metric(
@@ -336,7 +593,7 @@ with col3:
         delta_color="off"
     )
     if alert_medium > 0:
-        st.caption(", ".join(alert_medium_df["Région"].tolist()))
+        st.caption(", ".join(alert_medium_regions))
 
 with col4:
     st.metric(
@@ -346,7 +603,7 @@ with col4:
         delta_color="normal"
     )
     if alert_low > 0:
-        st.caption(", ".join(alert_low_df["Région"].tolist()))
+        st.caption(", ".join(alert_low_regions))
 
 
 with st.expander("Infos sur les niveaux d'alerte"):
@@ -370,36 +627,15 @@ if show_comparison and len(available_dates) > 1:
     comparison_dates = st.multiselect(
         "Sélectionner d'autres dates",
         options=[d for d in available_dates if d != selected_date],
-        default=[available_dates[min(1, len(available_dates)-1)]]  # Deuxième date par défaut
+        default=[available_dates[min(1, len(available_dates)-1)]],  # Deuxième date par défaut
+        key="comparison_dates"
     )
     
     if comparison_dates:
-        # Créer un DataFrame pour la comparaison
-        comparison_data = []
-        
-        # Ajouter la date actuelle
-        for region in selected_regions:
-            if region in security_data:
-                level, _, _ = calculate_alert_level(security_data[region], region, selected_date)
-                comparison_data.append({
-                    'Date': datetime.strptime(selected_date, "%Y-%m-%d").strftime("%d/%m/%Y"),
-                    'Région': region,
-                    'Niveau': level
-                })
-        
-        # Ajouter les dates de comparaison
-        for comp_date in comparison_dates:
-            comp_data = all_security_data.get(comp_date, {})
-            for region in selected_regions:
-                if region in comp_data:
-                    level, _, _ = calculate_alert_level(comp_data[region], region, comp_date)
-                    comparison_data.append({
-                        'Date': datetime.strptime(comp_date, "%Y-%m-%d").strftime("%d/%m/%Y"),
-                        'Région': region,
-                        'Niveau': level
-                    })
-        
-        comparison_df = pd.DataFrame(comparison_data)
+        # DataFrame de comparaison (date actuelle puis dates choisies), mis en cache
+        comparison_df = create_comparison_dataframe(
+            (selected_date, *comparison_dates), tuple(selected_regions)
+        )
         
         # Graphique de comparaison
         fig_comparison = px.bar(
@@ -411,7 +647,7 @@ if show_comparison and len(available_dates) > 1:
             title="Comparaison des Niveaux d'Alerte entre Dates",
             category_orders={"Niveau": ["Faible", "Moyen", "Élevé"]}
         )
-        st.plotly_chart(fig_comparison, width='stretch')
+        st.plotly_chart(fig_comparison, width='stretch', key="comparison_bar")
     
     st.markdown("---")
 
@@ -425,90 +661,43 @@ if show_stats:
     
     with col_chart1:
         # Graphique de répartition des niveaux d'alerte
-        alert_counts = filtered_df["Niveau d'alerte"].value_counts()
-        fig_pie = px.pie(
-            values=alert_counts.values,
-            names=alert_counts.index,
-            title="Répartition des Niveaux d'Alerte",
-            color=alert_counts.index,
-            color_discrete_map={
-                "Élevé": "#d32f2f",
-                "Moyen": "#f57c00",
-                "Faible": "#388e3c"
-            }
-        )
-        fig_pie.update_traces(textposition='inside', textinfo='percent+label')
-        st.plotly_chart(fig_pie, width='stretch')
+        alert_counts = regions_by_level.map(len)
+        st.plotly_chart(build_alert_pie(tuple(alert_counts.items())), width='stretch', key="alert_pie")
     
     with col_chart2:
         # Graphe d'évolution du risque par région (d'après risque.json)
         if not risk_data:
             st.info("⚠️ Pas de données dans risque.json pour afficher l'évolution.")
         else:
-            rows = []
-            # Trier les dates chronologiquement
-            sorted_dates = sorted(risk_data.keys())
-            score_map = {"Faible": 1, "Moyen": 2, "Élevé": 3}
-
             # Afficher uniquement ces régions (si elles existent)
             target_regions = ["Far North", "Littoral", "Centre", "North", "West"]
             # Respecter la sélection utilisateur si possible, sinon tomber back sur les régions présentes dans risque.json
             regions_to_plot = [r for r in target_regions if r in selected_regions]
             if not regions_to_plot:
-                regions_to_plot = [r for r in target_regions if any(r in risk_data.get(d, {}) for d in sorted_dates)]
-
-            for date_str in sorted_dates:
-                for region in regions_to_plot:
-                    level = risk_data.get(date_str, {}).get(region)
-                    if level:
-                        try:
-                            date_obj = datetime.strptime(date_str, "%Y-%m-%d")
-                        except Exception:
-                            date_obj = date_str
-                        rows.append({
-                            "Date": date_obj,
-                            "Région": region,
-                            "Niveau": level,
-                            "Score": score_map.get(level, None)
-                        })
-
-            if len(rows) == 0:
+                risk_regions = set(load_risk_evolution()["Région"])
+                regions_to_plot = [r for r in target_regions if r in risk_regions]
+
+            fig_evo = build_evolution_figure(tuple(regions_to_plot))
+            if fig_evo is None:
                 st.info("ℹ️ Aucune donnée d'évolution pour les régions sélectionnées.")
             else:
-                evo_df = pd.DataFrame(rows)
-                evo_df = evo_df.sort_values("Date")
-
-                fig_evo = px.line(
-                    evo_df,
-                    x="Date",
-                    y="Score",
-                    color="Région",
-                    line_shape="spline",
-                    markers=True,
-                    title="Évolution du niveau de risque par région (sélection restreinte)",
-                    hover_data=["Niveau"]
-                )
-
-                # Afficher labels lisibles pour l'axe Y
-                fig_evo.update_yaxes(
-                    tickmode="array",
-                    tickvals=[1, 2, 3],
-                    ticktext=["Faible", "Moyen", "Élevé"],
-                    range=[0.8, 3.2]
-                )
-
-                fig_evo.update_layout(hovermode="x unified", legend_title_text="Région")
-                st.plotly_chart(fig_evo, width='stretch')
+                st.plotly_chart(fig_evo, width='stretch', key="risk_evolution")
     
     # Analyse des couvre-feux
     st.subheader("🌙 Analyse des Couvre-feux")
-    couvre_feu_active = filtered_df[filtered_df['Couvre-feu'].str.lower() != 'ras']
+    couvre_feu_active = filtered_df[filtered_df['Couvre-feu actif']]
     
     if len(couvre_feu_active) > 0:
         st.info(f"⚠️ {len(couvre_feu_active)} région(s) avec restrictions de circulation nocturne")
         
-        for _, row in couvre_feu_active.iterrows():
-            st.markdown(f"**{row['Région']}** : {row['Couvre-feu']}")
+        # Un seul appel st.markdown pour toute la liste
+        st.markdown("\n\n".join(
+            f"**{region}** : {couvre_feu}"
+            for region, couvre_feu in zip(
+                couvre_feu_active['Région'].to_numpy(),
+                couvre_feu_active['Couvre-feu'].to_numpy()
+            )
+        ))
     else:
         st.success("✅ Aucune restriction de circulation nocturne en vigueur")
     
@@ -527,87 +716,9 @@ if show_map and gdf is not None:
     </div>
     """, unsafe_allow_html=True)
     
-    # Fonction pour créer le tooltip enrichi
-    def build_enhanced_tooltip(region):
-        d = security_data.get(region, {})
-        level, icon, color = calculate_alert_level(d, region, selected_date)
-        
-        return (
-            f"<div style='font-family: Arial; min-width: 250px;'>"
-            f"<h4 style='margin:0; color:{color};'>{icon} {region}</h4>"
-            f"<p style='margin:5px 0; font-size:0.9em; color:#666;'>{date_display}</p>"
-            f"<hr style='margin: 5px 0;'>"
-            f"<b>Niveau d'alerte :</b> <span style='color:{color};'>{level}</span><br><br>"
-            f"<b>🏛️ Situation générale :</b><br>{d.get('Situation générale', 'N/A')}<br><br>"
-            f"<b>💼 Activités économiques :</b><br>{d.get('Activités économiques', 'N/A')}<br><br>"
-            f"<b>🚗 Circulation :</b><br>{d.get('Circulation', 'N/A')}<br><br>"
-            f"<b>🌙 Couvre-feu :</b><br>{d.get('Couvre-feu', 'N/A')}"
-            f"</div>"
-        )
-    
-    # Fonction pour déterminer la couleur de la région
-    def get_region_color(region):
-        d = security_data.get(region, {})
-        level, _, color = calculate_alert_level(d, region, selected_date)
-        return color
-    
-    gdf["tooltip"] = gdf["shapeName"].apply(build_enhanced_tooltip)
-    gdf["alert_color"] = gdf["shapeName"].apply(get_region_color)
-    
-    # Filtrer le GeoDataFrame selon les sélections
-    gdf_filtered = gdf[gdf["shapeName"].isin(selected_regions)]
-    
-    # Création de la carte
-    m = folium.Map(
-        location=[7, 12],
-        zoom_start=6,
-        tiles='CartoDB positron',
-        name='CartoDB Positron'
-    )
-    
-    # Ajout des autres couches (optionnelles)
-    folium.TileLayer('CartoDB dark_matter', name='CartoDB Dark').add_to(m)
-    folium.TileLayer('OpenStreetMap', name='OpenStreetMap').add_to(m)
-    
-    # Ajout des régions avec couleurs dynamiques
-    for idx, row in gdf_filtered.iterrows():
-        folium.GeoJson(
-            row['geometry'],
-            style_function=lambda x, color=row['alert_color']: {
-                "fillColor": color,
-                "color": "black",
-                "weight": 2,
-                "fillOpacity": 0.5
-            },
-            highlight_function=lambda x: {
-                "weight": 4,
-                "color": "blue",
-                "fillOpacity": 0.7
-            },
-            tooltip=folium.Tooltip(row['tooltip'], sticky=True)
-        ).add_to(m)
-
-    
-    # Ajout d'une légende
-    legend_html = f'''
-    <div style="position: fixed; 
-                bottom: 50px; right: 50px; width: 200px; height: 140px; 
-                background-color: white; z-index:9999; font-size:14px;
-                border:2px solid grey; border-radius: 5px; padding: 10px">
-    <p style="margin:0; font-weight:bold;">Niveau d'alerte</p>
-    <p style="margin:3px 0; font-size:11px; color:#666;">{date_display}</p>
-    <p style="margin:5px 0;"><span style="color:#d32f2f;">⬤</span> Élevé</p>
-    <p style="margin:5px 0;"><span style="color:#f57c00;">⬤</span> Moyen</p>
-    <p style="margin:5px 0;"><span style="color:#388e3c;">⬤</span> Faible</p>
-    </div>
-    '''
-    m.get_root().html.add_child(folium.Element(legend_html))
-    
-    # Ajout du contrôle de couches
-    folium.LayerControl().add_to(m)
-    
-    # Affichage de la carte
-    st_folium(m, height=600, width=None, returned_objects=[])
+    # Affichage de la carte (HTML pré-rendu et mis en cache)
+    map_html = build_map_html(selected_date, tuple(sorted(selected_regions)))
+    components.html(map_html, height=600)
     
     st.markdown("---")
 
@@ -634,12 +745,12 @@ if show_table:
     st.dataframe(styled_df, width='stretch', height=400)
     
     # Bouton d'export
-    csv = display_df.to_csv(index=False, encoding='utf-8-sig')
     st.download_button(
         label=f"📥 Télécharger les données ({date_display})",
-        data=csv,
+        data=to_csv_bytes(display_df),
         file_name=f'veille_securitaire_{selected_date}.csv',
         mime='text/csv',
+        key="download_csv"
     )
 
 # -------------------------------------------------------
@@ -653,7 +764,7 @@ high_alerts = filtered_df[filtered_df["Niveau d'alerte"] == "Élevé"]
 if len(high_alerts) > 0:
     st.error(f"🚨 {len(high_alerts)} région(s) en alerte élevée le {date_display}")
     
-    for _, alert in high_alerts.iterrows():
+    for alert in high_alerts[['Région', 'Situation', 'Activités', 'Circulation', 'Couvre-feu']].to_dict('records'):
         with st.expander(f"🔴 {alert['Région']} - ALERTE ÉLEVÉE"):
             col1, col2 = st.columns(2)
             
@@ -670,11 +781,14 @@ else:
 # -------------------------------------------------------
 # FOOTER
 # -------------------------------------------------------
-st.markdown("---")
-st.markdown("""
+FOOTER_HTML = """
 <div style='text-align: center; color: #666; padding: 1rem;'>
     <p>🛡️ Système de Veille Sécuritaire - Cameroun</p>
     <p style='font-size: 0.9rem;'>Données actualisées en temps réel | Media Intelligence 2025</p>
 </div>
-""", unsafe_allow_html=True)
+"""
+
+st.markdown("---")
+# HTML statique inséré tel quel (pas de passage par le parseur Markdown)
+st.html(FOOTER_HTML)
 
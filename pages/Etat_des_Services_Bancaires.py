@@ -4,9 +4,11 @@
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
+from pathlib import Path
 import matplotlib.pyplot as plt
 
 
@@ -24,16 +26,14 @@ st.set_page_config(
 # -------------------------------------------------------
 # CHARGEMENT DES STYLES CSS EXTERNES
 # -------------------------------------------------------
-@st.cache_data
+@st.cache_resource
 def load_css(file_path="style.css"):
     """Charge le fichier CSS externe"""
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            css = f.read()
-        return css
-    except FileNotFoundError:
+    path = Path(file_path)
+    if not path.exists():
         st.warning(f"⚠️ Fichier CSS '{file_path}' non trouvé. Styles par défaut utilisés.")
         return ""
+    return path.read_text(encoding="utf-8")
 
 # Charger et appliquer les styles CSS
 css_content = load_css()
@@ -43,19 +43,28 @@ if css_content:
 # -------------------------------------------------------
 # CHARGEMENT DES DONNÉES BANCAIRES
 # -------------------------------------------------------
-@st.cache_data(ttl=300)  # Cache de 5 minutes
+@st.cache_data(ttl=300, show_spinner=False)  # Cache de 5 minutes
 def load_banking_data():
     """Charge les données bancaires depuis Google Sheets"""
     url = "https://docs.google.com/spreadsheets/d/1axXyNLPZYsJis_gdxQi6XBZ_6TFvwxqH9iN-3QgABHc/export?format=csv&gid=0"
     
     try:
-        df = pd.read_csv(url)
+        # Lecteur CSV pyarrow (multithread, déjà installé avec Streamlit)
+        df = pd.read_csv(url, engine='pyarrow')
+        # Conversion explicite : une date illisible devient NaT (écartée plus bas)
+        # au lieu de laisser toute la colonne en texte
+        df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
         
         # Nettoyage des données
-        df['Date'] = pd.to_datetime(df['Date'])
         df['Ouvert'] = df['Ouvert'].str.strip().str.lower().map({'oui': 'Oui', 'non': 'Non'})
         
-        return df
+        # Colonnes à faible cardinalité en catégories (codes entiers pour filtres et groupby)
+        for col in ('Ville', 'Quartier', 'Opérateurs', 'Ouvert', 'Heure de fermeture'):
+            df[col] = df[col].astype('category')
+        
+        # Index trié par date : la sélection d'un jour devient une découpe d'index
+        # (lignes sans date écartées, sinon l'index n'est plus monotone et la découpe échoue)
+        return df.dropna(subset=['Date']).set_index('Date').sort_index()
     except Exception as e:
         st.error(f"❌ Erreur lors du chargement des données : {e}")
         return pd.DataFrame()
@@ -63,6 +72,258 @@ def load_banking_data():
 # Charger les données
 df_banking = load_banking_data()
 
+# -------------------------------------------------------
+# AGRÉGATS (MIS EN CACHE PAR SÉLECTION)
+# -------------------------------------------------------
+@st.cache_data(show_spinner=False)
+def compute_city_stats(df):
+    """Établissements ouverts/fermés et taux d'ouverture par ville"""
+    city_stats = df.groupby('Ville', observed=True).agg(
+        Total=('Opérateurs', 'count'),
+        Ouverts=('is_open', 'sum')
+    ).reset_index()
+    
+    city_stats['Fermés'] = city_stats['Total'] - city_stats['Ouverts']
+    city_stats = city_stats.astype({'Total': 'int16', 'Ouverts': 'int16', 'Fermés': 'int16'})
+    city_stats['Taux d\'ouverture (%)'] = (city_stats['Ouverts'] / city_stats['Total'] * 100).round(1)
+    return city_stats
+
+@st.cache_data(show_spinner=False)
+def compute_quarter_stats(df):
+    """Taux d'ouverture par quartier, du meilleur au moins bon"""
+    quarter_stats = df.groupby(['Ville', 'Quartier'], observed=True).agg(
+        Total=('Opérateurs', 'count'),
+        Ouverts=('is_open', 'sum')
+    ).reset_index().astype({'Total': 'int16', 'Ouverts': 'int16'})
+    
+    quarter_stats['Taux d\'ouverture (%)'] = (quarter_stats['Ouverts'] / quarter_stats['Total'] * 100).round(1)
+    return quarter_stats.sort_values('Taux d\'ouverture (%)', ascending=False)
+
+@st.cache_data(show_spinner=False)
+def compute_operator_stats(df):
+    """Agences ouvertes/fermées et taux d'ouverture par opérateur (taux croissant)"""
+    operator_stats = df.groupby('Opérateurs', observed=True).agg(**{
+        'Agences Ouvertes': ('is_open', 'sum'),
+        'Total Agences': ('Ville', 'count')
+    }).reset_index().rename(columns={'Opérateurs': 'Opérateur'})
+    
+    operator_stats['Agences Fermées'] = operator_stats['Total Agences'] - operator_stats['Agences Ouvertes']
+    operator_stats = operator_stats.astype({'Agences Ouvertes': 'int16', 'Total Agences': 'int16', 'Agences Fermées': 'int16'})
+    operator_stats['Taux d\'ouverture (%)'] = (operator_stats['Agences Ouvertes'] / operator_stats['Total Agences'] * 100).round(1)
+    return operator_stats.sort_values('Taux d\'ouverture (%)', ascending=True)
+
+@st.cache_data(show_spinner=False)
+def build_summary(quarter_stats, operator_stats):
+    """Textes du panneau Résumé (None quand l'élément n'a pas lieu d'être affiché)"""
+    rate = 'Taux d\'ouverture (%)'
+    summary = {
+        'best_quarter': None, 'best_operator': None,
+        'low_quarters_title': None, 'low_quarters_md': None,
+        'closed_operators_title': None, 'closed_operators_md': None
+    }
+    
+    # Meilleur quartier
+    if len(quarter_stats) > 0:
+        best_quarter = quarter_stats.loc[quarter_stats[rate].idxmax()]
+        summary['best_quarter'] = f"🏆 **Meilleur quartier** : {best_quarter['Quartier']} ({best_quarter['Ville']}) - {best_quarter[rate]:.1f}% d'ouverture"
+    
+    # Opérateur le plus ouvert
+    if len(operator_stats) > 0:
+        best_operator = operator_stats.loc[operator_stats[rate].idxmax()]
+        if best_operator[rate] == 100:
+            summary['best_operator'] = f"🏦 **{best_operator['Opérateur']}** : Toutes les agences ouvertes ({int(best_operator['Agences Ouvertes'])})"
+    
+    # Quartiers avec taux d'ouverture faible (les trois premiers détaillés)
+    low_quarters = quarter_stats[quarter_stats[rate] < 50]
+    if len(low_quarters) > 0:
+        top_low = low_quarters.head(3)
+        summary['low_quarters_title'] = f"🔴 {len(low_quarters)} quartier(s) avec moins de 50% d'ouverture"
+        summary['low_quarters_md'] = "\n\n".join(
+            f"• **{quartier}** ({ville}) : {taux:.1f}%"
+            for quartier, ville, taux in zip(
+                top_low['Quartier'].to_numpy(),
+                top_low['Ville'].to_numpy(),
+                top_low[rate].to_numpy()
+            )
+        )
+    
+    # Opérateurs complètement fermés
+    closed_operators = operator_stats[operator_stats[rate] == 0]
+    if len(closed_operators) > 0:
+        summary['closed_operators_title'] = f"⚠️ {len(closed_operators)} opérateur(s) complètement fermé(s)"
+        summary['closed_operators_md'] = "\n\n".join(f"• {op}" for op in closed_operators['Opérateur'])
+    
+    return summary
+
+@st.cache_data(show_spinner=False)
+def compute_hours_table(df):
+    """Détail des horaires, trié par ville puis heure de fermeture"""
+    return df.sort_values(['Ville', 'Heure de fermeture'])
+
+@st.cache_data(show_spinner=False)
+def to_csv_bytes(df):
+    """Export CSV (UTF-8 avec BOM pour Excel), régénéré seulement quand le tableau change"""
+    return df.to_csv(index=False).encode('utf-8-sig')
+
+# -------------------------------------------------------
+# GRAPHIQUES (MIS EN CACHE PAR TABLEAU D'AGRÉGATS)
+# -------------------------------------------------------
+def rate_colors(rates):
+    """Couleurs associées aux taux d'ouverture (vert >= 70 %, orange >= 40 %, rouge sinon)"""
+    rates = np.asarray(rates)
+    return np.select([rates >= 70, rates >= 40], ['#388e3c', '#f57c00'], default='#d32f2f')
+
+@st.cache_data(show_spinner=False)
+def build_city_figures(city_stats):
+    """Graphiques par ville : ouverts/fermés empilés et taux d'ouverture"""
+    fig_bars = go.Figure()
+    
+    fig_bars.add_trace(go.Bar(
+        name='Ouverts',
+        x=city_stats['Ville'],
+        y=city_stats['Ouverts'],
+        marker_color='#388e3c',
+        text=city_stats['Ouverts'],
+        textposition='inside'
+    ))
+    
+    fig_bars.add_trace(go.Bar(
+        name='Fermés',
+        x=city_stats['Ville'],
+        y=city_stats['Fermés'],
+        marker_color='#d32f2f',
+        text=city_stats['Fermés'],
+        textposition='inside'
+    ))
+    
+    fig_bars.update_layout(
+        title="Établissements Ouverts vs Fermés par Ville",
+        barmode='stack',
+        xaxis_title="Ville",
+        yaxis_title="Nombre d'établissements"
+    )
+    
+    fig_rate = go.Figure(go.Bar(
+        x=city_stats['Ville'],
+        y=city_stats['Taux d\'ouverture (%)'],
+        text=city_stats['Taux d\'ouverture (%)'].apply(lambda x: f"{x:.1f}%"),
+        textposition='outside',
+        marker_color=rate_colors(city_stats['Taux d\'ouverture (%)'])
+    ))
+    
+    fig_rate.update_layout(
+        title="Taux d'Ouverture par Ville",
+        xaxis_title="Ville",
+        yaxis_title="Taux d'ouverture (%)",
+        yaxis_range=[0, 100]
+    )
+    
+    return fig_bars, fig_rate
+
+@st.cache_data(show_spinner=False)
+def build_quarter_figure(quarter_stats):
+    """Graphique du taux d'ouverture par quartier"""
+    fig_quarter = px.bar(
+        quarter_stats,
+        x='Quartier',
+        y='Taux d\'ouverture (%)',
+        color='Ville',
+        title="Taux d'Ouverture par Quartier",
+        text='Taux d\'ouverture (%)',
+        color_discrete_map={'Douala': '#1f77b4', 'Yaoundé': '#2ca02c'}
+    )
+    
+    fig_quarter.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
+    fig_quarter.update_layout(xaxis_tickangle=-45, yaxis_range=[0, 110])
+    return fig_quarter
+
+MAX_OPERATOR_BARS = 20
+
+@st.cache_data(show_spinner=False)
+def build_operator_figure(operator_stats):
+    """Graphique horizontal du taux d'ouverture par opérateur"""
+    fig_operators = go.Figure(go.Bar(
+        y=operator_stats['Opérateur'],
+        x=operator_stats['Taux d\'ouverture (%)'],
+        orientation='h',
+        text=operator_stats['Taux d\'ouverture (%)'].apply(lambda x: f"{x:.1f}%"),
+        textposition='outside',
+        marker_color=rate_colors(operator_stats['Taux d\'ouverture (%)'])
+    ))
+    
+    fig_operators.update_layout(
+        title="Taux d'Ouverture par Opérateur",
+        xaxis_title="Taux d'ouverture (%)",
+        yaxis_title="Opérateur",
+        xaxis_range=[0, 110],
+        height=max(400, min(len(operator_stats), MAX_OPERATOR_BARS) * 40)
+    )
+    
+    # Au-delà de MAX_OPERATOR_BARS, hauteur plafonnée : seuls les mieux classés sont affichés,
+    # les autres restent accessibles en faisant glisser l'axe
+    if len(operator_stats) > MAX_OPERATOR_BARS:
+        n = len(operator_stats)
+        fig_operators.update_yaxes(range=[n - MAX_OPERATOR_BARS - 0.5, n - 0.5])
+    return fig_operators
+
+def bucket_hours(hours):
+    """Ramène des horaires saisis librement (15h, 15h40, 15:40...) à la demi-heure inférieure"""
+    text = hours.astype(str).str.strip()
+    parts = text.str.extract(r'^(\d{1,2})\s*[hH:.]?\s*(\d{2})?')
+    hour = pd.to_numeric(parts[0], errors='coerce')
+    minute = pd.to_numeric(parts[1], errors='coerce').fillna(0) // 30 * 30
+    buckets = hour.map('{:02.0f}'.format, na_action='ignore') + ':' + minute.map('{:02.0f}'.format)
+    # Horaires non reconnus : libellé d'origine conservé
+    return buckets.fillna(text)
+
+@st.cache_data(show_spinner=False)
+def build_hours_figures(hours):
+    """Graphiques des horaires de fermeture : répartition globale et par ville"""
+    # Tranches de 30 minutes ; les tranches de moins de 1 % sont regroupées dans « Autres »
+    hour_counts = bucket_hours(hours['Heure de fermeture']).value_counts().sort_index()
+    minor = hour_counts / hour_counts.sum() < 0.01
+    if minor.any():
+        hour_counts = pd.concat([hour_counts[~minor], pd.Series({'Autres': hour_counts[minor].sum()})])
+    
+    # Trace go.Pie directe : tranches dans l'ordre des heures, sans tri ni automargin
+    fig_hours = go.Figure(go.Pie(
+        values=hour_counts.to_numpy(),
+        labels=hour_counts.index.astype(str),
+        hole=0.4,
+        sort=False,
+        textinfo='percent',
+        automargin=False
+    ))
+    fig_hours.update_layout(title="Distribution des Horaires de Fermeture", uirevision="hours")
+    
+    # Tableau croisé heure x ville (catégories inutilisées retirées : seules les valeurs présentes)
+    hour_by_city = pd.crosstab(
+        hours['Heure de fermeture'].cat.remove_unused_categories(),
+        hours['Ville'].cat.remove_unused_categories()
+    )
+    
+    # Une trace go.Bar par ville ; uirevision conserve l'état des axes d'un rerun à l'autre
+    city_colors = {'Douala': '#1f77b4', 'Yaoundé': '#2ca02c'}
+    fig_hours_city = go.Figure([
+        go.Bar(
+            name=ville,
+            x=hour_by_city.index.to_numpy(),
+            y=hour_by_city[ville].to_numpy(),
+            marker_color=city_colors.get(ville)
+        )
+        for ville in hour_by_city.columns
+    ])
+    
+    fig_hours_city.update_layout(
+        title="Horaires de Fermeture par Ville",
+        barmode='group',
+        xaxis_title="Heure de fermeture",
+        yaxis_title="Count",
+        legend_title_text="Ville",
+        uirevision="hours_city"
+    )
+    return fig_hours, fig_hours_city
+
 # -------------------------------------------------------
 # HEADER
 # -------------------------------------------------------
@@ -71,7 +332,7 @@ st.markdown('<div class="main-header">🏦 État des Services Bancaires </div>',
 
 if not df_banking.empty:
     # Dernière date de mise à jour
-    last_update = df_banking['Date'].max().strftime("%d/%m/%Y")
+    last_update = df_banking.index.max().strftime("%d/%m/%Y")
     st.markdown(f'<div class="timestamp">📅 Données du : {last_update}</div>', 
                 unsafe_allow_html=True)
 else:
@@ -92,15 +353,20 @@ st.sidebar.title("🎛️ Filtres")
 st.sidebar.markdown("---")
 
 # Filtre par date
-available_dates = sorted(df_banking['Date'].dt.date.unique(), reverse=True)
+available_dates = list(df_banking.index.normalize().unique().dropna()[::-1].date)
 selected_date = st.sidebar.selectbox(
     "📅 Sélectionner une date",
     options=available_dates,
-    format_func=lambda x: x.strftime("%d/%m/%Y")
+    format_func=lambda x: x.strftime("%d/%m/%Y"),
+    key="bank_date_selector"
 )
 
 # Filtrer les données par date
-df_filtered = df_banking[df_banking['Date'].dt.date == selected_date].copy()
+day_start = pd.Timestamp(selected_date)
+day_end = day_start + pd.Timedelta(days=1) - pd.Timedelta(1, unit='ns')
+df_filtered = df_banking.loc[day_start:day_end].reset_index()
+# Statut d'ouverture précalculé une fois (agrégations en C plutôt que lambdas Python)
+df_filtered['is_open'] = (df_filtered['Ouvert'] == 'Oui').astype('int8')
 
 st.sidebar.markdown("---")
 
@@ -108,7 +374,8 @@ st.sidebar.markdown("---")
 all_cities = ['Toutes'] + sorted(df_filtered['Ville'].unique().tolist())
 selected_city = st.sidebar.selectbox(
     "🏙️ Sélectionner une ville",
-    options=all_cities
+    options=all_cities,
+    key="bank_city_filter"
 )
 
 if selected_city != 'Toutes':
@@ -119,7 +386,8 @@ st.sidebar.markdown("---")
 # Filtre par statut
 status_filter = st.sidebar.radio(
     "🔍 Filtrer par statut",
-    options=['Tous', 'Ouverts uniquement', 'Fermés uniquement']
+    options=['Tous', 'Ouverts uniquement', 'Fermés uniquement'],
+    key="bank_status_filter"
 )
 
 if status_filter == 'Ouverts uniquement':
@@ -134,8 +402,8 @@ st.subheader("📊 Vue d'Ensemble")
 
 # Calcul des statistiques
 total_banks = len(df_filtered)
-banks_open = len(df_filtered[df_filtered['Ouvert'] == 'Oui'])
-banks_closed = len(df_filtered[df_filtered['Ouvert'] == 'Non'])
+banks_open = int(df_filtered['is_open'].sum())
+banks_closed = int((df_filtered['Ouvert'] == 'Non').sum())  # comparaison sur les codes de catégorie
 opening_rate = (banks_open / total_banks * 100) if total_banks > 0 else 0
 
 # Affichage des métriques
@@ -182,68 +450,18 @@ if selected_city == 'Toutes':
     st.subheader("🏙️ Comparaison par Ville")
     
     # Statistiques par ville
-    city_stats = df_filtered.groupby('Ville').agg({
-        'Opérateurs': 'count',
-        'Ouvert': lambda x: (x == 'Oui').sum()
-    }).reset_index()
-    
-    city_stats.columns = ['Ville', 'Total', 'Ouverts']
-    city_stats['Fermés'] = city_stats['Total'] - city_stats['Ouverts']
-    city_stats['Taux d\'ouverture (%)'] = (city_stats['Ouverts'] / city_stats['Total'] * 100).round(1)
+    city_stats = compute_city_stats(df_filtered)
     
     col_chart1, col_chart2 = st.columns(2)
+    fig_bars, fig_rate = build_city_figures(city_stats)
     
     with col_chart1:
         # Graphique en barres empilées
-        fig_bars = go.Figure()
-        
-        fig_bars.add_trace(go.Bar(
-            name='Ouverts',
-            x=city_stats['Ville'],
-            y=city_stats['Ouverts'],
-            marker_color='#388e3c',
-            text=city_stats['Ouverts'],
-            textposition='inside'
-        ))
-        
-        fig_bars.add_trace(go.Bar(
-            name='Fermés',
-            x=city_stats['Ville'],
-            y=city_stats['Fermés'],
-            marker_color='#d32f2f',
-            text=city_stats['Fermés'],
-            textposition='inside'
-        ))
-        
-        fig_bars.update_layout(
-            title="Établissements Ouverts vs Fermés par Ville",
-            barmode='stack',
-            xaxis_title="Ville",
-            yaxis_title="Nombre d'établissements"
-        )
-        
-        st.plotly_chart(fig_bars, use_container_width=True)
+        st.plotly_chart(fig_bars, use_container_width=True, key="bank_city_bars")
     
     with col_chart2:
         # Graphique du taux d'ouverture
-        fig_rate = go.Figure(go.Bar(
-            x=city_stats['Ville'],
-            y=city_stats['Taux d\'ouverture (%)'],
-            text=city_stats['Taux d\'ouverture (%)'].apply(lambda x: f"{x:.1f}%"),
-            textposition='outside',
-            marker_color=city_stats['Taux d\'ouverture (%)'].apply(
-                lambda x: '#388e3c' if x >= 70 else '#f57c00' if x >= 40 else '#d32f2f'
-            )
-        ))
-        
-        fig_rate.update_layout(
-            title="Taux d'Ouverture par Ville",
-            xaxis_title="Ville",
-            yaxis_title="Taux d'ouverture (%)",
-            yaxis_range=[0, 100]
-        )
-        
-        st.plotly_chart(fig_rate, use_container_width=True)
+        st.plotly_chart(fig_rate, use_container_width=True, key="bank_city_rate")
     
     # Tableau comparatif
     st.markdown("### 📋 Tableau Comparatif")
@@ -265,29 +483,13 @@ if selected_city == 'Toutes':
 st.subheader("📍 Analyse par Quartier")
 
 # Statistiques par quartier
-quarter_stats = df_filtered.groupby(['Ville', 'Quartier']).agg({
-    'Opérateurs': 'count',
-    'Ouvert': lambda x: (x == 'Oui').sum()
-}).reset_index()
-
-quarter_stats.columns = ['Ville', 'Quartier', 'Total', 'Ouverts']
-quarter_stats['Taux d\'ouverture (%)'] = (quarter_stats['Ouverts'] / quarter_stats['Total'] * 100).round(1)
-quarter_stats = quarter_stats.sort_values('Taux d\'ouverture (%)', ascending=False)
-
-# Graphique par quartier
-fig_quarter = px.bar(
-    quarter_stats,
-    x='Quartier',
-    y='Taux d\'ouverture (%)',
-    color='Ville',
-    title="Taux d'Ouverture par Quartier",
-    text='Taux d\'ouverture (%)',
-    color_discrete_map={'Douala': '#1f77b4', 'Yaoundé': '#2ca02c'}
-)
+quarter_stats = compute_quarter_stats(df_filtered)
 
-fig_quarter.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
-fig_quarter.update_layout(xaxis_tickangle=-45, yaxis_range=[0, 110])
-st.plotly_chart(fig_quarter, use_container_width=True)
+# Graphique par quartier (rien à tracer si les filtres ne laissent aucun établissement)
+if not quarter_stats.empty:
+    st.plotly_chart(build_quarter_figure(quarter_stats), use_container_width=True, key="bank_quarters_bar")
+else:
+    st.info("ℹ️ Aucun établissement pour les filtres sélectionnés")
 
 st.markdown("---")
 
@@ -297,37 +499,11 @@ st.markdown("---")
 st.subheader("🏦 Analyse par Opérateur Bancaire")
 
 # Statistiques par opérateur
-operator_stats = df_filtered.groupby('Opérateurs').agg({
-    'Ouvert': lambda x: (x == 'Oui').sum(),
-    'Ville': 'count'
-}).reset_index()
-
-operator_stats.columns = ['Opérateur', 'Agences Ouvertes', 'Total Agences']
-operator_stats['Agences Fermées'] = operator_stats['Total Agences'] - operator_stats['Agences Ouvertes']
-operator_stats['Taux d\'ouverture (%)'] = (operator_stats['Agences Ouvertes'] / operator_stats['Total Agences'] * 100).round(1)
-operator_stats = operator_stats.sort_values('Taux d\'ouverture (%)', ascending=True)
+operator_stats = compute_operator_stats(df_filtered)
 
 # Graphique horizontal par opérateur
-fig_operators = go.Figure(go.Bar(
-    y=operator_stats['Opérateur'],
-    x=operator_stats['Taux d\'ouverture (%)'],
-    orientation='h',
-    text=operator_stats['Taux d\'ouverture (%)'].apply(lambda x: f"{x:.1f}%"),
-    textposition='outside',
-    marker_color=operator_stats['Taux d\'ouverture (%)'].apply(
-        lambda x: '#388e3c' if x >= 70 else '#f57c00' if x >= 40 else '#d32f2f'
-    )
-))
-
-fig_operators.update_layout(
-    title="Taux d'Ouverture par Opérateur",
-    xaxis_title="Taux d'ouverture (%)",
-    yaxis_title="Opérateur",
-    xaxis_range=[0, 110],
-    height=max(400, len(operator_stats) * 40)
-)
-
-st.plotly_chart(fig_operators, use_container_width=True)
+if not operator_stats.empty:
+    st.plotly_chart(build_operator_figure(operator_stats), use_container_width=True, key="bank_operators_bar")
 
 st.markdown("---")
 
@@ -336,49 +512,27 @@ st.markdown("---")
 # -------------------------------------------------------
 st.subheader("⏰ Analyse des Horaires de Fermeture")
 
-# Banques ouvertes avec horaire
-banks_with_hours = df_filtered[
-    (df_filtered['Ouvert'] == 'Oui') & 
-    (df_filtered['Heure de fermeture'].notna())
-].copy()
+# Banques ouvertes avec horaire (masque NumPy sur is_open et les codes de catégorie, -1 = manquant)
+hours_mask = (df_filtered['is_open'].to_numpy() == 1) & (df_filtered['Heure de fermeture'].cat.codes.to_numpy() >= 0)
 
-if len(banks_with_hours) > 0:
+# Sous-tableau construit uniquement si au moins une ligne correspond
+if hours_mask.any():
+    banks_with_hours = df_filtered.iloc[hours_mask]
     col_hour1, col_hour2 = st.columns(2)
     
+    fig_hours, fig_hours_city = build_hours_figures(banks_with_hours[['Ville', 'Heure de fermeture']])
+    
     with col_hour1:
         # Distribution des horaires de fermeture
-        hour_counts = banks_with_hours['Heure de fermeture'].value_counts().sort_index()
-        
-        fig_hours = px.pie(
-            values=hour_counts.values,
-            names=hour_counts.index,
-            title="Distribution des Horaires de Fermeture",
-            hole=0.4
-        )
-        
-        st.plotly_chart(fig_hours, use_container_width=True)
+        st.plotly_chart(fig_hours, use_container_width=True, key="bank_hours_pie")
     
     with col_hour2:
         # Horaires par ville
-        hour_by_city = banks_with_hours.groupby(['Ville', 'Heure de fermeture']).size().reset_index(name='Count')
-        
-        fig_hours_city = px.bar(
-            hour_by_city,
-            x='Heure de fermeture',
-            y='Count',
-            color='Ville',
-            title="Horaires de Fermeture par Ville",
-            barmode='group',
-            color_discrete_map={'Douala': '#1f77b4', 'Yaoundé': '#2ca02c'}
-        )
-        
-        st.plotly_chart(fig_hours_city, use_container_width=True)
+        st.plotly_chart(fig_hours_city, use_container_width=True, key="bank_hours_by_city")
     
     # Tableau des horaires
     st.markdown("### 📋 Détail des Horaires par Établissement")
-    hours_table = banks_with_hours[['Ville', 'Quartier', 'Opérateurs', 'Heure de fermeture']].sort_values(
-        ['Ville', 'Heure de fermeture']
-    )
+    hours_table = compute_hours_table(banks_with_hours[['Ville', 'Quartier', 'Opérateurs', 'Heure de fermeture']])
     st.dataframe(hours_table, use_container_width=True)
 else:
     st.info("ℹ️ Aucune information d'horaire de fermeture disponible pour les établissements ouverts")
@@ -391,33 +545,32 @@ st.markdown("---")
 st.subheader("📋 Liste Complète des Établissements")
 
 # Préparer le tableau
-display_cols = ['Ville', 'Quartier', 'Opérateurs', 'Ouvert', 'Heure de fermeture']
+display_cols = ['Ville', 'Quartier', 'Opérateurs', 'Heure de fermeture']
 table_df = df_filtered[display_cols].copy()
 
-# Ajouter des icônes pour le statut
-table_df['Statut'] = table_df['Ouvert'].apply(lambda x: '🟢 Ouvert' if x == 'Oui' else '🔴 Fermé')
-table_df = table_df.drop('Ouvert', axis=1)
+# Ajouter des icônes pour le statut (d'après l'indicateur is_open déjà calculé)
+table_df['Statut'] = np.where(df_filtered['is_open'].to_numpy() == 1, '🟢 Ouvert', '🔴 Fermé')
 
-# Réorganiser les colonnes
+# Réorganiser les colonnes, établissements ouverts en premier
 table_df = table_df[['Statut', 'Ville', 'Quartier', 'Opérateurs', 'Heure de fermeture']]
-
-# Fonction de coloration
-def color_status(row):
-    if '🟢' in str(row['Statut']):
-        return ['background-color: #e8f5e9'] * len(row)
-    else:
-        return ['background-color: #ffebee'] * len(row)
-
-styled_table = table_df.style.apply(color_status, axis=1)
-st.dataframe(styled_table, use_container_width=True, height=400)
+table_df = table_df.sort_values('Statut', ascending=False, kind='stable')
+
+# Statut signalé par l'icône (pas de Styler : aucun rappel Python par ligne au rendu)
+st.dataframe(
+    table_df,
+    use_container_width=True,
+    height=400,
+    hide_index=True,
+    column_config={"Statut": st.column_config.TextColumn("Statut", width="small")}
+)
 
 # Bouton d'export
-csv = table_df.to_csv(index=False, encoding='utf-8-sig')
 st.download_button(
     label=f"📥 Télécharger la liste ({selected_date.strftime('%d/%m/%Y')})",
-    data=csv,
+    data=to_csv_bytes(table_df),
     file_name=f'services_bancaires_{selected_date.strftime("%Y%m%d")}.csv',
     mime='text/csv',
+    key="bank_download_csv"
 )
 
 # -------------------------------------------------------
@@ -426,6 +579,9 @@ st.download_button(
 st.markdown("---")
 st.subheader("📊 Résumé et Recommandations")
 
+# Textes précalculés (mis en cache avec les tableaux d'agrégats)
+summary = build_summary(quarter_stats, operator_stats)
+
 col_summary1, col_summary2 = st.columns(2)
 
 with col_summary1:
@@ -438,44 +594,34 @@ with col_summary1:
     else:
         st.error(f"🚨 **Situation critique** : Seulement {opening_rate:.1f}% des établissements sont ouverts")
     
-    # Meilleur quartier
-    if len(quarter_stats) > 0:
-        best_quarter = quarter_stats.iloc[0]
-        st.info(f"🏆 **Meilleur quartier** : {best_quarter['Quartier']} ({best_quarter['Ville']}) - {best_quarter['Taux d\'ouverture (%)']:.1f}% d'ouverture")
-    
-    # Opérateur le plus ouvert
-    if len(operator_stats) > 0:
-        best_operator = operator_stats.sort_values('Taux d\'ouverture (%)', ascending=False).iloc[0]
-        if best_operator['Taux d\'ouverture (%)'] == 100:
-            st.success(f"🏦 **{best_operator['Opérateur']}** : Toutes les agences ouvertes ({int(best_operator['Agences Ouvertes'])})")
+    if summary['best_quarter']:
+        st.info(summary['best_quarter'])
+    if summary['best_operator']:
+        st.success(summary['best_operator'])
 
 with col_summary2:
     st.markdown("### ⚠️ Zones à Problème")
     
-    # Quartiers avec taux d'ouverture faible
-    low_quarters = quarter_stats[quarter_stats['Taux d\'ouverture (%)'] < 50]
-    
-    if len(low_quarters) > 0:
-        st.error(f"🔴 {len(low_quarters)} quartier(s) avec moins de 50% d'ouverture")
-        for _, q in low_quarters.head(3).iterrows():
-            st.markdown(f"• **{q['Quartier']}** ({q['Ville']}) : {q['Taux d\'ouverture (%)']:.1f}%")
+    if summary['low_quarters_title']:
+        st.error(summary['low_quarters_title'])
+        st.markdown(summary['low_quarters_md'])
     else:
         st.success("✅ Aucun quartier critique identifié")
     
-    # Opérateurs complètement fermés
-    closed_operators = operator_stats[operator_stats['Taux d\'ouverture (%)'] == 0]
-    if len(closed_operators) > 0:
-        st.warning(f"⚠️ {len(closed_operators)} opérateur(s) complètement fermé(s)")
-        for _, op in closed_operators.iterrows():
-            st.markdown(f"• {op['Opérateur']}")
+    if summary['closed_operators_title']:
+        st.warning(summary['closed_operators_title'])
+        st.markdown(summary['closed_operators_md'])
 
 # -------------------------------------------------------
 # FOOTER
 # -------------------------------------------------------
-st.markdown("---")
-st.markdown("""
+FOOTER_HTML = """
 <div style='text-align: center; color: #666; padding: 1rem;'>
     <p>🏦 Monitoring des Services Bancaires - Yaoundé & Douala</p>
     <p style='font-size: 0.9rem;'>Données en temps réel depuis Google Sheets | Media Intelligence 2025</p>
 </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+"""
+
+st.markdown("---")
+# HTML statique inséré tel quel (pas de passage par le parseur Markdown)
+st.html(FOOTER_HTML)
\ No newline at end of file